@@ -12,7 +12,7 @@ import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 from sommelier import SommelierEngine
-from wine_parser import WineAggregator, WineType, Wine as ParserWine
+from wine_parser import WineAggregator, WineType, Wine as ParserWine, close_session
 from content_routes import admin_router, public_router
 
 app = FastAPI(
@@ -57,6 +57,12 @@ async def startup_warmup():
     asyncio.create_task(_warmup_cache())
 
 
+@app.on_event("shutdown")
+async def shutdown_http_pool():
+    """Close the store HTTP connection pool shared by all parsers"""
+    close_session()
+
+
 async def _warmup_cache():
     """Background task to fill cache"""
     try:
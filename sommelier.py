@@ -9,13 +9,17 @@ Core principles:
 4. Regional pairings (local food + local wine)
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from enum import Enum
+from functools import lru_cache
+from operator import attrgetter
+from types import MappingProxyType
 from typing import Optional
-import copy
+import heapq
+import sys
 
 
-class CookingMethod(Enum):
+class CookingMethod(str, Enum):
     """Cooking method"""
     RAW = "raw"
     STEAMED = "steamed"
@@ -29,7 +33,7 @@ class CookingMethod(Enum):
     BAKED = "baked"
 
 
-class WineStyle(Enum):
+class WineStyle(str, Enum):
     """Wine style"""
     WHITE_LIGHT = "white_light"
     WHITE_AROMATIC = "white_aromatic"
@@ -41,16 +45,31 @@ class WineStyle(Enum):
     SPARKLING = "sparkling"
 
 
-@dataclass
+# Canonical instance of every grape/region/search-term tuple used by a recommendation
+_SHARED_NAMES: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+
+@dataclass(frozen=True, slots=True)
 class WineRecommendation:
     """Wine recommendation"""
     style: WineStyle
-    grape_varieties: list[str]
-    regions: list[str]
+    grape_varieties: tuple[str, ...]
+    regions: tuple[str, ...]
     wine_type: str
     description: str
-    search_terms: list[str]
+    search_terms: tuple[str, ...]
     priority: int
+    # Store search queries, derived once per instance (see get_search_queries)
+    _queries: tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Name lists become tuples of interned strings; equal tuples are also shared
+        # (via _SHARED_NAMES) across recs and their per-language copies
+        for name in ("grape_varieties", "regions", "search_terms"):
+            names = tuple(map(sys.intern, getattr(self, name)))
+            object.__setattr__(self, name, _SHARED_NAMES.setdefault(names, names))
+        object.__setattr__(self, "wine_type", sys.intern(self.wine_type))
+        object.__setattr__(self, "_queries", _build_queries(self))
 
 
 # =============================================================================
@@ -371,10 +390,27 @@ TRANSLATIONS = {
 }
 
 
+_BY_PRIO = attrgetter("priority")
+_VINO = "vino "
+_TRANSLATABLE = frozenset({"ru", "uk", "be", "es"})
+_LANGS = _TRANSLATABLE | {"en"}
+_FULL_BODIED = frozenset({WineStyle.RED_FULL, WineStyle.WHITE_FULL})
+
+
+def _build_queries(rec: WineRecommendation) -> tuple[str, ...]:
+    """Store search queries for one recommendation (first region/grape, first two terms)"""
+    queries = []
+    for region in rec.regions[:1]:
+        queries.append("".join((_VINO, rec.wine_type, " ", region)))
+    for word in rec.grape_varieties[:1] + rec.search_terms[:2]:
+        queries.append(_VINO + word)
+    return tuple(queries)
+
+
 def translate(text: str, lang: str) -> str:
     """Translate a description string to the given language.
     Falls back to English (original) if lang='en' or translation is missing."""
-    if lang == "en" or lang not in ("ru", "uk", "be", "es"):
+    if lang == "en" or lang not in _TRANSLATABLE:
         return text
     entry = TRANSLATIONS.get(text)
     if entry and lang in entry:
@@ -382,9 +418,22 @@ def translate(text: str, lang: str) -> str:
     return text
 
 
+def _localized(rec: WineRecommendation, lang: str) -> WineRecommendation:
+    """rec with its description translated to lang (rec itself if unchanged)"""
+    description = translate(rec.description, lang)
+    return rec if description == rec.description else replace(rec, description=description)
+
+
+def _localize(recs: tuple[WineRecommendation, ...], lang: str) -> tuple[WineRecommendation, ...]:
+    """recs sorted by priority, with descriptions translated to lang"""
+    return tuple(_localized(r, lang) for r in sorted(recs, key=_BY_PRIO))
+
+
 class SommelierEngine:
     """Expert sommelier system"""
 
+    __slots__ = ()
+
     SPANISH_GRAPES = {
         "albarino": {"type": "white", "body": "light", "regions": ["Rias Baixas"]},
         "verdejo": {"type": "white", "body": "light", "regions": ["Rueda"]},
@@ -402,123 +451,137 @@ class SommelierEngine:
 
     PAIRING_MATRIX = {
         # === FISH ===
-        ("fish", "raw"): [
+        ("fish", "raw"): (
             WineRecommendation(WineStyle.WHITE_LIGHT, ["albarino", "verdejo"], ["Rias Baixas", "Rueda"], "blanco", "Fresh white with minerality enhances raw fish", ["albarino", "verdejo", "blanco"], 1),
             WineRecommendation(WineStyle.SPARKLING, ["macabeo", "xarello", "parellada"], ["Penedes"], "cava", "Cava freshness is classic with raw fish", ["cava", "brut"], 2),
-        ],
-        ("fish", "steamed"): [
+        ),
+        ("fish", "steamed"): (
             WineRecommendation(WineStyle.WHITE_LIGHT, ["albarino", "godello"], ["Rias Baixas", "Valdeorras"], "blanco", "Delicate steamed fish needs an elegant wine", ["albarino", "godello", "blanco"], 1),
-        ],
-        ("fish", "grilled"): [
+        ),
+        ("fish", "grilled"): (
             WineRecommendation(WineStyle.WHITE_FULL, ["godello", "chardonnay"], ["Valdeorras", "Penedes"], "blanco", "Grilling adds intensity - needs fuller white", ["godello", "chardonnay", "fermentado barrica"], 1),
             WineRecommendation(WineStyle.ROSE, ["garnacha", "tempranillo"], ["Navarra", "Rioja"], "rosado", "Rose is versatile with grilled fish", ["rosado", "garnacha"], 2),
-        ],
-        ("fish", "tomato"): [
+        ),
+        ("fish", "tomato"): (
             WineRecommendation(WineStyle.ROSE, ["garnacha", "tempranillo"], ["Navarra", "Cigales"], "rosado", "Tomato sauce needs wine with good acidity", ["rosado"], 1),
             WineRecommendation(WineStyle.RED_LIGHT, ["mencia"], ["Bierzo"], "tinto", "Light Mencia - bold but successful pairing", ["mencia", "bierzo", "tinto joven"], 2),
-        ],
-        ("fish", "creamy"): [
+        ),
+        ("fish", "creamy"): (
             WineRecommendation(WineStyle.WHITE_FULL, ["chardonnay", "viura"], ["Penedes", "Rioja"], "blanco", "Creamy sauce needs oaked white with body", ["chardonnay", "blanco fermentado barrica", "blanco crianza"], 1),
-        ],
-        ("fish", "baked"): [
+        ),
+        ("fish", "baked"): (
             WineRecommendation(WineStyle.WHITE_FULL, ["godello", "chardonnay"], ["Valdeorras", "Penedes"], "blanco", "Baked fish needs fuller white with body", ["godello", "chardonnay", "blanco barrica"], 1),
-        ],
+        ),
 
         # === MEAT ===
-        ("meat", "raw"): [
+        ("meat", "raw"): (
             WineRecommendation(WineStyle.RED_LIGHT, ["mencia", "garnacha"], ["Bierzo", "Navarra"], "tinto", "Raw meat like tartare needs light elegant red", ["mencia", "tinto joven"], 1),
-        ],
-        ("meat", "grilled"): [
+        ),
+        ("meat", "grilled"): (
             WineRecommendation(WineStyle.RED_MEDIUM, ["tempranillo"], ["Rioja", "Ribera del Duero"], "tinto", "Classic: grilled steak + Tempranillo Crianza", ["tempranillo", "crianza", "rioja", "ribera"], 1),
             WineRecommendation(WineStyle.RED_FULL, ["garnacha", "carinena"], ["Priorat"], "tinto", "For rich meat - powerful Priorat", ["priorat", "garnacha"], 2),
-        ],
-        ("meat", "roasted"): [
+        ),
+        ("meat", "roasted"): (
             WineRecommendation(WineStyle.RED_MEDIUM, ["tempranillo"], ["Rioja", "Ribera del Duero", "Toro"], "tinto", "Roasted meat + aged Tempranillo - perfect", ["reserva", "gran reserva", "tempranillo"], 1),
-        ],
-        ("meat", "stewed"): [
+        ),
+        ("meat", "stewed"): (
             WineRecommendation(WineStyle.RED_FULL, ["monastrell", "garnacha"], ["Jumilla", "Yecla", "Priorat"], "tinto", "Stewed meat needs rich wine with tannins", ["monastrell", "jumilla", "garnacha"], 1),
-        ],
-        ("meat", "spicy"): [
+        ),
+        ("meat", "spicy"): (
             WineRecommendation(WineStyle.RED_MEDIUM, ["garnacha"], ["Campo de Borja", "Navarra"], "tinto", "Spicy meat loves fruity Garnacha", ["garnacha", "campo de borja"], 1),
-        ],
-        ("meat", "tomato"): [
+        ),
+        ("meat", "tomato"): (
             WineRecommendation(WineStyle.RED_MEDIUM, ["tempranillo", "garnacha"], ["Rioja", "Navarra"], "tinto", "Tomato sauce pairs well with Crianza", ["crianza", "tinto"], 1),
-        ],
-        ("meat", "creamy"): [
+        ),
+        ("meat", "creamy"): (
             WineRecommendation(WineStyle.RED_LIGHT, ["mencia", "tempranillo"], ["Bierzo", "Rioja"], "tinto", "Creamy sauce needs softer red wine", ["mencia", "tinto joven"], 1),
-        ],
-        ("meat", "baked"): [
+        ),
+        ("meat", "baked"): (
             WineRecommendation(WineStyle.RED_MEDIUM, ["tempranillo", "garnacha"], ["Rioja", "Ribera del Duero"], "tinto", "Baked meat pairs beautifully with aged Tempranillo", ["crianza", "reserva", "tempranillo"], 1),
-        ],
+        ),
 
         # === POULTRY ===
-        ("poultry", "grilled"): [
+        ("poultry", "grilled"): (
             WineRecommendation(WineStyle.RED_LIGHT, ["mencia", "garnacha"], ["Bierzo", "Navarra"], "tinto", "Grilled poultry loves light fruity reds", ["mencia", "garnacha", "tinto joven"], 1),
             WineRecommendation(WineStyle.WHITE_FULL, ["chardonnay", "godello"], ["Penedes", "Valdeorras"], "blanco", "Oaked white is elegant with grilled chicken", ["chardonnay", "godello", "blanco barrica"], 2),
-        ],
-        ("poultry", "roasted"): [
+        ),
+        ("poultry", "roasted"): (
             WineRecommendation(WineStyle.RED_MEDIUM, ["tempranillo", "garnacha"], ["Rioja", "Navarra"], "tinto", "Roast chicken pairs with medium reds", ["crianza", "tempranillo", "garnacha"], 1),
-        ],
-        ("poultry", "creamy"): [
+        ),
+        ("poultry", "creamy"): (
             WineRecommendation(WineStyle.WHITE_FULL, ["chardonnay", "viura"], ["Penedes", "Rioja"], "blanco", "Creamy chicken needs rich oaked white", ["chardonnay", "blanco crianza"], 1),
-        ],
-        ("poultry", "baked"): [
+        ),
+        ("poultry", "baked"): (
             WineRecommendation(WineStyle.WHITE_FULL, ["chardonnay", "godello"], ["Penedes", "Valdeorras"], "blanco", "Baked poultry pairs with rich oaked white", ["chardonnay", "godello", "blanco barrica"], 1),
-        ],
+        ),
 
         # === VEGETABLES ===
-        ("vegetables", "raw"): [
+        ("vegetables", "raw"): (
             WineRecommendation(WineStyle.WHITE_LIGHT, ["verdejo", "albarino"], ["Rueda", "Rias Baixas"], "blanco", "Fresh salads pair with crisp white wines", ["verdejo", "albarino", "blanco"], 1),
-        ],
-        ("vegetables", "grilled"): [
+        ),
+        ("vegetables", "grilled"): (
             WineRecommendation(WineStyle.ROSE, ["garnacha", "tempranillo"], ["Navarra", "Rioja"], "rosado", "Rose is perfect with grilled vegetables", ["rosado", "garnacha"], 1),
-        ],
-        ("vegetables", "steamed"): [
+        ),
+        ("vegetables", "steamed"): (
             WineRecommendation(WineStyle.WHITE_LIGHT, ["verdejo", "albarino"], ["Rueda", "Rias Baixas"], "blanco", "Light white for delicate steamed veggies", ["verdejo", "albarino", "blanco"], 1),
-        ],
-        ("vegetables", "tomato"): [
+        ),
+        ("vegetables", "tomato"): (
             WineRecommendation(WineStyle.ROSE, ["garnacha"], ["Navarra", "Cigales"], "rosado", "Tomato dishes pair beautifully with rose", ["rosado", "garnacha"], 1),
-        ],
-        ("vegetables", "baked"): [
+        ),
+        ("vegetables", "baked"): (
             WineRecommendation(WineStyle.ROSE, ["garnacha", "tempranillo"], ["Navarra", "Rioja"], "rosado", "Baked vegetables love a good rose", ["rosado", "garnacha"], 1),
-        ],
+        ),
 
         # === PASTA ===
-        ("pasta", "tomato"): [
+        ("pasta", "tomato"): (
             WineRecommendation(WineStyle.RED_MEDIUM, ["tempranillo", "garnacha"], ["Rioja", "Navarra"], "tinto", "Tomato pasta loves Spanish Crianza", ["crianza", "tempranillo", "tinto"], 1),
-        ],
-        ("pasta", "creamy"): [
+        ),
+        ("pasta", "creamy"): (
             WineRecommendation(WineStyle.WHITE_FULL, ["chardonnay", "godello"], ["Penedes", "Valdeorras"], "blanco", "Rich creamy pasta needs oaked white", ["chardonnay", "godello", "blanco barrica"], 1),
-        ],
-        ("pasta", "baked"): [
+        ),
+        ("pasta", "baked"): (
             WineRecommendation(WineStyle.RED_MEDIUM, ["tempranillo", "garnacha"], ["Rioja", "Navarra"], "tinto", "Baked pasta pairs with medium bodied red", ["crianza", "tinto"], 1),
-        ],
+        ),
 
         # === CHEESE ===
-        ("cheese", "grilled"): [
+        ("cheese", "grilled"): (
             WineRecommendation(WineStyle.RED_LIGHT, ["garnacha", "tempranillo"], ["Navarra", "Rioja"], "tinto", "Grilled cheese with fruity young red", ["tinto joven", "garnacha"], 1),
-        ],
+        ),
     }
 
     DEFAULT_RECOMMENDATIONS = {
-        "fish": [
+        "fish": (
             WineRecommendation(WineStyle.WHITE_LIGHT, ["albarino", "verdejo"], ["Rias Baixas", "Rueda"], "blanco", "Fresh white wine for fish", ["blanco", "albarino", "verdejo"], 1),
-        ],
-        "meat": [
+        ),
+        "meat": (
             WineRecommendation(WineStyle.RED_MEDIUM, ["tempranillo"], ["Rioja", "Ribera del Duero"], "tinto", "Red Tempranillo - classic with meat", ["tinto", "crianza", "tempranillo", "rioja"], 1),
-        ],
-        "poultry": [
+        ),
+        "poultry": (
             WineRecommendation(WineStyle.RED_LIGHT, ["mencia", "garnacha"], ["Bierzo", "Navarra"], "tinto", "Light red pairs well with poultry", ["tinto joven", "mencia", "garnacha"], 1),
-        ],
-        "vegetables": [
+        ),
+        "vegetables": (
             WineRecommendation(WineStyle.WHITE_LIGHT, ["verdejo"], ["Rueda"], "blanco", "Fresh Verdejo white for vegetables", ["verdejo", "rueda", "blanco"], 1),
-        ],
-        "pasta": [
+        ),
+        "pasta": (
             WineRecommendation(WineStyle.RED_LIGHT, ["tempranillo"], ["Rioja"], "tinto", "Versatile red for pasta", ["tinto joven"], 1),
-        ],
-        "cheese": [
+        ),
+        "cheese": (
             WineRecommendation(WineStyle.RED_MEDIUM, ["tempranillo"], ["Rioja", "Ribera del Duero"], "tinto", "Aged red wine for cheese", ["crianza", "reserva"], 1),
-        ],
+        ),
+    }
+
+    # Extra recommendation prepended when a meal-time modifier flag is set
+    MEAL_TIME_RECOMMENDATIONS = {
+        "prefer_sparkling": WineRecommendation(
+            WineStyle.SPARKLING, ["macabeo", "xarello", "parellada"], ["Penedes"],
+            "cava", "Cava - perfect choice for aperitivo", ["cava", "brut"], 0
+        ),
+        "prefer_full_bodied": WineRecommendation(
+            WineStyle.RED_FULL, ["tempranillo", "monastrell"],
+            ["Rioja", "Ribera del Duero", "Jumilla"], "tinto",
+            "Rich aged red wine - perfect digestif to end the meal",
+            ["reserva", "gran reserva", "crianza"], 0
+        ),
     }
 
     MEAL_TIME_MODIFIERS = {
@@ -536,6 +599,32 @@ class SommelierEngine:
         "unknown": {},
     }
 
+    @classmethod
+    def _compile(cls) -> tuple[MappingProxyType, MappingProxyType]:
+        """Build the request-path lookup tables from the static matrices.
+
+        Runs once at import (see _INDEX / _MEAL_TIME_RECS below), so each
+        language's descriptions are translated exactly once.
+        """
+        # index[lang][dish][method] -> recs; the None method holds the dish default,
+        # so a miss falls back on the same inner dict the hit came from
+        indexes = {}
+        for lang in _LANGS:
+            index = {}
+            for (dish, method), recs in cls.PAIRING_MATRIX.items():
+                index.setdefault(dish, {})[method] = _localize(recs, lang)
+            for dish, recs in cls.DEFAULT_RECOMMENDATIONS.items():
+                index.setdefault(dish, {})[None] = _localize(recs, lang)
+            indexes[lang] = index
+        meal_time_recs = {
+            lang: {
+                flag: _localized(rec, lang)
+                for flag, rec in cls.MEAL_TIME_RECOMMENDATIONS.items()
+            }
+            for lang in _LANGS
+        }
+        return MappingProxyType(indexes), MappingProxyType(meal_time_recs)
+
     def get_recommendations(
         self,
         dish: str,
@@ -546,70 +635,97 @@ class SommelierEngine:
         max_results: int = 3
     ) -> list[WineRecommendation]:
         """Get wine recommendations with optional localization via lang param."""
-        recommendations = []
-
-        # 1. Exact match (dish + cooking method)
-        if cooking_method:
-            key = (dish, cooking_method)
-            if key in self.PAIRING_MATRIX:
-                recommendations = copy.deepcopy(self.PAIRING_MATRIX[key])
-
-        # 2. Fallback to defaults
-        if not recommendations and dish in self.DEFAULT_RECOMMENDATIONS:
-            recommendations = copy.deepcopy(self.DEFAULT_RECOMMENDATIONS[dish])
-
-        # 3. Meal time modifiers
-        if meal_time and meal_time in self.MEAL_TIME_MODIFIERS:
-            modifier = self.MEAL_TIME_MODIFIERS[meal_time]
-
-            if modifier.get("prefer_sparkling"):
-                recommendations.insert(0, WineRecommendation(
-                    WineStyle.SPARKLING, ["macabeo", "xarello", "parellada"], ["Penedes"],
-                    "cava", "Cava - perfect choice for aperitivo", ["cava", "brut"], 0
-                ))
-
-            if modifier.get("avoid_full_bodied"):
-                for rec in recommendations:
-                    if rec.style in [WineStyle.RED_FULL, WineStyle.WHITE_FULL]:
-                        rec.priority += 2
-
-            if modifier.get("prefer_full_bodied"):
-                recommendations.insert(0, WineRecommendation(
-                    WineStyle.RED_FULL, ["tempranillo", "monastrell"],
-                    ["Rioja", "Ribera del Duero", "Jumilla"], "tinto",
-                    "Rich aged red wine - perfect digestif to end the meal",
-                    ["reserva", "gran reserva", "crianza"], 0
-                ))
-
-        # 4. Sort
-        recommendations.sort(key=lambda x: x.priority)
-
-        # 5. Translate descriptions to requested language
-        if lang != "en":
-            for rec in recommendations:
-                rec.description = translate(rec.description, lang)
-
-        return recommendations[:max_results]
+        # Normalise inputs that don't change the result so they share cache entries:
+        # unknown languages fall back to English, unknown meal times apply no modifier,
+        # and cuisine is not applied (CUISINE_MODIFIERS are not wired into ranking yet)
+        if lang not in _LANGS:
+            lang = "en"
+        if meal_time not in self.MEAL_TIME_MODIFIERS:
+            meal_time = None
+        # Common case: no modifier, so the pre-sorted table slice is the answer.
+        # Entries hold at most a few recs, and slicing a tuple at or past its length
+        # returns the tuple itself, so the stored entries double as top-k buckets.
+        if meal_time is None:
+            return list(self._lookup(dish, cooking_method, lang)[:max_results])
+        # Recommendations are frozen, so cached instances are shared safely
+        return list(self._cached_recommendations(dish, cooking_method, meal_time, lang, max_results))
+
+    def recommend_batch(
+        self,
+        items: list[tuple[str, Optional[str]]],
+        lang: str = "en",
+        max_results: int = 3
+    ) -> list[list[WineRecommendation]]:
+        """Recommendations for many (dish, cooking_method) pairs, e.g. a whole menu.
+        Same results as get_recommendations without meal_time, one list per item."""
+        if lang not in _LANGS:
+            lang = "en"
+        lookup = self._lookup
+        return [list(lookup(dish, cooking_method, lang)[:max_results]) for dish, cooking_method in items]
+
+    @classmethod
+    def _lookup(cls, dish: str, cooking_method: Optional[str], lang: str) -> tuple[WineRecommendation, ...]:
+        """Exact (dish, cooking method) match, falling back to the dish default"""
+        by_method = _INDEX[lang].get(dish)
+        if not by_method:
+            return ()
+        return by_method.get(cooking_method) or by_method.get(None, ())
+
+    @classmethod
+    @lru_cache(maxsize=2048)
+    def _cached_recommendations(
+        cls,
+        dish: str,
+        cooking_method: Optional[str],
+        meal_time: str,
+        lang: str,
+        max_results: int
+    ) -> tuple[WineRecommendation, ...]:
+        """Build recommendations; pure in its arguments, so memoized per input tuple."""
+        # 1. Exact match (dish + cooking method), 2. fallback to the dish default
+        # Tables are pre-sorted by priority in _compile(); only modifiers reorder them
+        recommendations = cls._lookup(dish, cooking_method, lang)
+        bump = 0
+
+        # 3. Meal time modifiers (only reached with a known meal_time)
+        modifier = cls.MEAL_TIME_MODIFIERS[meal_time]
+        # Prebuilt per-language singletons, prepended by tuple concatenation
+        extras = _MEAL_TIME_RECS[lang]
+
+        if modifier.get("prefer_sparkling"):
+            recommendations = (extras["prefer_sparkling"],) + recommendations
+
+        if modifier.get("avoid_full_bodied"):
+            bump = 2
+
+        if modifier.get("prefer_full_bodied"):
+            recommendations = (extras["prefer_full_bodied"],) + recommendations
+
+        # 4. Keep the top max_results by priority (stable, like sort + slice)
+        if not bump:
+            return recommendations[:max_results]
+
+        # Bumped recs are new objects; the shared table entries are never mutated
+        bumped = [replace(r, priority=r.priority + bump) if r.style in _FULL_BODIED else r for r in recommendations]
+        if max_results < 0:
+            # nsmallest would return nothing; slice like the other paths so a
+            # negative count drops items from the end regardless of meal_time
+            return tuple(sorted(bumped, key=_BY_PRIO)[:max_results])
+        return tuple(heapq.nsmallest(max_results, bumped, key=_BY_PRIO))
 
     def get_search_queries(self, recommendations: list[WineRecommendation]) -> list[str]:
         """Get search queries for stores"""
         queries = []
+        seen = set()
+        add, append = seen.add, queries.append
         for rec in recommendations:
-            for region in rec.regions[:1]:
-                queries.append(f"vino {rec.wine_type} {region}")
-            for grape in rec.grape_varieties[:1]:
-                queries.append(f"vino {grape}")
-            for term in rec.search_terms[:2]:
-                if term not in queries:
-                    queries.append(f"vino {term}")
-        return list(dict.fromkeys(queries))
-
-
-if __name__ == "__main__":
-    sommelier = SommelierEngine()
-
-    for test_lang in ["en", "ru", "es"]:
-        recs = sommelier.get_recommendations("fish", "grilled", "dinner", lang=test_lang)
-        print(f"\n=== lang={test_lang} ===")
-        for i, rec in enumerate(recs, 1):
-            print(f"  {i}. {rec.description}")
+            for query in rec._queries:
+                if query not in seen:
+                    add(query)
+                    append(query)
+        return queries
+
+
+# Read-only, module-level request tables: shared by all engines and threads,
+# and read with a single global lookup instead of an attribute walk
+_INDEX, _MEAL_TIME_RECS = SommelierEngine._compile()
@@ -0,0 +1,21 @@
+"""
+Sommelier Engine demo
+Run: python sommelier_demo.py
+"""
+
+from sommelier import SommelierEngine
+
+
+def main():
+    """Print localized recommendations for a sample dish"""
+    sommelier = SommelierEngine()
+
+    for test_lang in ["en", "ru", "es"]:
+        recs = sommelier.get_recommendations("fish", "grilled", "dinner", lang=test_lang)
+        print(f"\n=== lang={test_lang} ===")
+        for i, rec in enumerate(recs, 1):
+            print(f"  {i}. {rec.description}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,72 @@ Wine Parser PoC - Consum & Mercadona
 Fetching wine data from Spanish supermarkets
 """
 
+import heapq
+import logging
+import math
+import re
+import sys
+import threading
 import requests
 import json
-from dataclasses import dataclass, asdict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import attrgetter
 from typing import Optional
 from enum import Enum
+from urllib.parse import urlencode
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads  # stdlib json accepts bytes as well
+
+try:
+    from bs4 import BeautifulSoup, SoupStrainer  # only DIA scrapes HTML
+except ImportError:
+    BeautifulSoup = SoupStrainer = None
+
+try:
+    import lxml  # noqa: F401 — only probed so BeautifulSoup can use the C parser
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
+
+logger = logging.getLogger(__name__)
+
+
+# One pooled session shared by every parser: keeps TLS connections to the
+# store APIs alive between searches. Parsers pass their own headers per request.
+# requests already sends "Connection: keep-alive" by default.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    # Retry-After is ignored so a throttled store can't park a worker past the
+    # aggregator timeouts; 500 is not retried and POST (Mercadona) stays on the
+    # default allowed_methods, i.e. is never retried.
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 502, 503, 504),
+        respect_retry_after_header=False,
+    ),
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+
+def close_session():
+    """Release the pooled connections of the shared session.
+
+    The pool is process-wide: every parser of every WineAggregator uses it,
+    so call this only at application shutdown, never per aggregator.
+    """
+    _SESSION.close()
 
 
 class WineType(Enum):
@@ -27,7 +88,7 @@ class Store(Enum):
     FROIZ = "froiz"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Wine:
     """Unified wine data structure"""
     id: str
@@ -45,6 +106,146 @@ class Wine:
     discount_percent: Optional[int] = None
 
 
+# D.O. regions recognised in product names, in match priority order.
+# Each store keeps the list (and order) it has always matched against:
+# with overlapping names the order decides the winner ("Mencia Bierzo Toro").
+_REGIONS = (
+    "Rioja", "Ribera del Duero", "Rueda", "R\u00EDas Baixas",
+    "Priorat", "Pened\u00E8s", "Jumilla", "Toro", "Navarra",
+    "La Mancha", "Valdepe\u00F1as", "Utiel-Requena", "Cari\u00F1ena",
+)
+_CONDIS_REGIONS = _REGIONS + ("Somontano", "Campo de Borja", "Bierzo", "Yecla")
+_MASYMAS_REGIONS = _CONDIS_REGIONS + ("Valdeorras", "Alicante", "Valencia")
+_DIA_REGIONS = _CONDIS_REGIONS + ("Valdeorras", "Castilla La Mancha", "Valencia", "Alicante")
+_FROIZ_REGIONS = (
+    "Rioja", "Ribera del Duero", "Rueda", "R\u00EDas Baixas",
+    "Ribeiro", "Valdeorras", "Bierzo", "Priorat", "Pened\u00E8s",
+    "Jumilla", "Toro", "Navarra", "La Mancha", "Valdepe\u00F1as",
+    "Somontano", "Campo de Borja", "Yecla", "Cigales",
+)
+_WINE_TYPES = (WineType.TINTO, WineType.BLANCO, WineType.ROSADO, WineType.CAVA, WineType.ESPUMOSO)
+
+# One group per alternative: m.lastindex gives the priority rank of the match.
+# Zero-width lookahead so every start position is tried: overlapping names
+# ("Yecla Mancha") still yield the higher-priority region, as the old scan did.
+_REGION_RES = {
+    regions: re.compile("(?=(?:" + "|".join(f"({re.escape(r)})" for r in regions) + "))", re.IGNORECASE)
+    for regions in (_REGIONS, _CONDIS_REGIONS, _MASYMAS_REGIONS, _DIA_REGIONS, _FROIZ_REGIONS)
+}
+_WINE_TYPE_VALUES = tuple(t.value for t in _WINE_TYPES)
+# Leading \b only: "excavado" is not a cava, but plurals like "tintos" still match
+_WINE_TYPE_RE = re.compile(r"\b(?:" + "|".join(f"({v})" for v in _WINE_TYPE_VALUES) + ")", re.IGNORECASE)
+
+
+# The same products come back for every wine type and premium query, so the
+# extraction helpers are memoized by name.
+@lru_cache(maxsize=4096)
+def _extract_region(name: str, regions: tuple[str, ...] = _REGIONS) -> Optional[str]:
+    """Extract DO region from name, first in `regions` order wins"""
+    rank = min((m.lastindex for m in _REGION_RES[regions].finditer(name)), default=0)
+    return regions[rank - 1] if rank else None
+
+
+@lru_cache(maxsize=4096)
+def _extract_wine_type(name: str) -> Optional[str]:
+    """Extract wine type from name"""
+    rank = min((m.lastindex for m in _WINE_TYPE_RE.finditer(name)), default=0)
+    return _WINE_TYPE_VALUES[rank - 1] if rank else None
+
+
+def _region_from_keywords(text: str, keywords: dict[str, str]) -> Optional[str]:
+    """Map a store category field to a D.O. via its keyword -> region table"""
+    if not text:
+        return None
+    text_lower = text.lower()
+    for key, region in keywords.items():
+        if key in text_lower:
+            return region
+    return None
+
+
+def _dig(obj, path):
+    """Follow a key path through nested dicts; lists step into their first element"""
+    for key in path:
+        if isinstance(obj, list):
+            obj = obj[0] if obj else None
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+def _first_text(obj, paths) -> str:
+    """First non-empty scalar found along paths, as a string"""
+    for path in paths:
+        value = _dig(obj, path)
+        if value and not isinstance(value, (dict, list)):
+            return str(value)
+    return ""
+
+
+def _first_number(obj, paths) -> float:
+    """First non-zero number found along paths"""
+    for path in paths:
+        value = _dig(obj, path)
+        if value:
+            number = float(value)
+            if number:
+                return number
+    return 0.0
+
+
+# Conditional GET state, most recently used last:
+# (url, params, headers, variant) -> (validator headers, parsed wines).
+# Bounded LRU so a long-running API process doesn't grow it per distinct query;
+# the lock keeps the reorder/evict steps consistent across aggregator threads.
+_VALIDATED: OrderedDict[tuple, tuple[dict, list[Wine]]] = OrderedDict()
+_VALIDATED_MAX = 256
+_VALIDATED_LOCK = threading.Lock()
+
+
+def _get_wines(session, url: str, params: dict, headers: dict, parse, variant=None) -> list[Wine]:
+    """GET a search endpoint and parse it into wines.
+
+    Replays ETag / Last-Modified from the previous response to the same
+    request; on 304 Not Modified the wines parsed last time are reused.
+    The request headers are part of the key, since a store may vary its
+    response on them (Accept, Accept-Language, ...).
+    `variant` tells apart different parses of the same response, e.g. the
+    search type used as the wine_type fallback.
+    """
+    key = (url, tuple(sorted(params.items())), tuple(sorted(headers.items())), variant)
+    with _VALIDATED_LOCK:
+        cached = _VALIDATED.get(key)
+        if cached:
+            _VALIDATED.move_to_end(key)
+    if cached:
+        headers = {**headers, **cached[0]}
+
+    response = session.get(url, params=params, headers=headers, timeout=15)
+    logger.debug("GET %s -> %s", response.url, response.status_code)
+    if cached and response.status_code == 304:
+        return list(cached[1])
+    response.raise_for_status()
+    # Empty body (204, Content-Length: 0): nothing to decode, nothing to cache
+    if not response.content:
+        return []
+
+    wines = parse(response)
+    validators = {}
+    if "ETag" in response.headers:
+        validators["If-None-Match"] = response.headers["ETag"]
+    if "Last-Modified" in response.headers:
+        validators["If-Modified-Since"] = response.headers["Last-Modified"]
+    if validators:
+        with _VALIDATED_LOCK:
+            _VALIDATED[key] = (validators, wines)
+            _VALIDATED.move_to_end(key)
+            while len(_VALIDATED) > _VALIDATED_MAX:
+                _VALIDATED.popitem(last=False)
+    return list(wines)
+
+
 class ConsumParser:
     """
     Parser for tienda.consum.es
@@ -52,15 +253,48 @@ class ConsumParser:
     """
     
     BASE_URL = "https://tienda.consum.es/api/rest/V1.0"
+
+    # The API has shipped several product shapes; fields are tried in order
+    NAME_PATHS = (
+        ("productData", "name", "name"), ("productData", "name", "value"), ("productData", "name"),
+        ("name", "name"), ("name", "value"), ("name",), ("displayName",), ("title",),
+    )
+    BRAND_PATHS = (
+        ("productData", "brand", "name"), ("productData", "brand", "id"), ("productData", "brand"),
+        ("brand", "name"), ("brand", "id"), ("brand",), ("manufacturer", "name"), ("manufacturer",),
+    )
+    EAN_PATHS = (
+        ("productData", "ean", "value"), ("productData", "ean", "code"), ("productData", "ean"),
+        ("ean", "value"), ("ean", "code"), ("ean",), ("gtin",),
+    )
+    PRICE_PATHS = (
+        ("priceData", "prices", "value", "centAmount"), ("priceData", "prices", "price"),
+        ("priceData", "price"), ("priceData", "unitPrice"), ("price",), ("unitPrice",),
+    )
+    PRICE_PER_LITER_PATHS = (
+        ("priceData", "prices", "value", "centUnitAmount"), ("priceData", "prices", "pricePerUnit"),
+        ("pricePerUnit",), ("referencePrice",),
+    )
+    SLUG_PATHS = (
+        ("productData", "slug", "value"), ("productData", "slug", "url"), ("productData", "slug"),
+        ("slug", "value"), ("slug",), ("url", "value"), ("url",),
+    )
+    IMAGE_PATHS = (
+        ("media", "url"),  # Consum moved images to media[]; imageURL now 404s
+        ("productData", "imageURL", "url"), ("productData", "imageURL", "src"), ("productData", "imageURL"),
+        ("productData", "image", "url"), ("productData", "image", "src"), ("productData", "image"),
+        ("imageURL", "url"), ("imageURL", "src"), ("imageURL",),
+        ("image", "url"), ("image", "src"), ("image",), ("thumbnail",),
+    )
     
     def __init__(self, postal_code: str = "46001"):
         self.postal_code = postal_code
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = _SESSION
+        self.headers = {
             "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X)",
             "Accept": "application/json",
             "Accept-Language": "es-ES,es;q=0.9",
-        })
+        }
     
     def search_wines(self, wine_type: WineType = WineType.TINTO, limit: int = 50, custom_query: str = None) -> list[Wine]:
         """Search wines by type or custom query"""
@@ -77,252 +311,114 @@ class ConsumParser:
         }
         
         try:
-            response = self.session.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            
-            wines = []
-            
-            # Try different response structures
-            products = []
-            if isinstance(data, dict):
-                # New structure: catalog is a dict with 'products' key inside
-                catalog = data.get("catalog", {})
-                
-                if isinstance(catalog, dict):
-                    products = catalog.get("products", [])
-                elif isinstance(catalog, list):
-                    products = catalog
-                
-                # Fallback to other keys
-                if not products:
-                    products = data.get("products", data.get("results", data.get("items", [])))
-                    
-            elif isinstance(data, list):
-                products = data
-            
-            for item in products:
-                wine = self._parse_product(item)
-                if wine:
-                    wines.append(wine)
-            
-            print(f"✅ Consum: {len(wines)} wines (from {len(products)} products)")
-            return wines
+            return _get_wines(self.session, url, params, self.headers, self._parse_response)
             
         except requests.RequestException as e:
-            print(f"❌ Consum API error: {e}")
+            logger.error("Consum API error: %s", e)
             return []
         except Exception as e:
-            print(f"❌ Consum parsing error: {e}")
+            logger.error("Consum parsing error: %s", e)
             return []
     
-    def _safe_get(self, data, key, default=None):
-        """Safely get value from dict or list"""
+    def _parse_response(self, response) -> list[Wine]:
+        """Parse a search response into wines"""
+        data = _loads(response.content)
+        
+        # Try different response structures
+        products = []
         if isinstance(data, dict):
-            return data.get(key, default)
-        elif isinstance(data, list) and len(data) > 0:
-            # If it's a list, try to get from first element
-            if isinstance(data[0], dict):
-                return data[0].get(key, default)
-        return default
+            # New structure: catalog is a dict with 'products' key inside
+            catalog = data.get("catalog", {})
+            
+            if isinstance(catalog, dict):
+                products = catalog.get("products", [])
+            elif isinstance(catalog, list):
+                products = catalog
+            
+            # Fallback to other keys
+            if not products:
+                products = data.get("products", data.get("results", data.get("items", [])))
+                
+        elif isinstance(data, list):
+            products = data
+        
+        wines = [w for w in map(self._parse_product, products) if w]
+        
+        logger.info("Consum: %d wines (from %d products)", len(wines), len(products))
+        return wines
     
     def _parse_product(self, item: dict) -> Optional[Wine]:
         """Unified wine data structure"""
+        # Handle both old and new API structures
+        if isinstance(item, list):
+            if len(item) == 0:
+                return None
+            item = item[0] if isinstance(item[0], dict) else {"id": str(item[0])}
+        if not isinstance(item, dict):
+            return None
+        
+        # Base data
+        # Price first: unpriced items are rejected before any other lookups
         try:
-            # Handle both old and new API structures
-            if isinstance(item, list):
-                if len(item) == 0:
-                    return None
-                item = item[0] if isinstance(item[0], dict) else {"id": str(item[0])}
-            
-            # Base data
-            product_id = str(item.get("id", ""))
-            
-            # productData can be dict or list
-            product_data = item.get("productData", {})
-            if isinstance(product_data, list):
-                product_data = product_data[0] if product_data else {}
-            
-            name = product_data.get("name", "") if isinstance(product_data, dict) else ""
-            # Name could also be a dict in some cases
-            if isinstance(name, dict):
-                name = name.get("name", name.get("value", str(name)))
-            name = str(name) if name else ""
-            
-            brand_data = product_data.get("brand", "") if isinstance(product_data, dict) else ""
-            
-            # Brand can be string or dict with 'name' key
-            if isinstance(brand_data, dict):
-                brand = brand_data.get("name", brand_data.get("id", ""))
-            else:
-                brand = str(brand_data) if brand_data else ""
-            
-            # Fallback: try direct fields if productData is empty
-            if not name:
-                fallback_name = item.get("name", item.get("displayName", item.get("title", "")))
-                if isinstance(fallback_name, dict):
-                    name = fallback_name.get("name", fallback_name.get("value", ""))
-                else:
-                    name = str(fallback_name) if fallback_name else ""
-            if not brand:
-                fallback_brand = item.get("brand", item.get("manufacturer", ""))
-                if isinstance(fallback_brand, dict):
-                    brand = fallback_brand.get("name", fallback_brand.get("id", ""))
-                else:
-                    brand = str(fallback_brand) if fallback_brand else ""
-            
-            # EAN код
-            ean = product_data.get("ean", "") if isinstance(product_data, dict) else ""
-            if isinstance(ean, dict):
-                ean = ean.get("value", ean.get("code", ""))
-            ean = str(ean) if ean else ""
-            
-            if not ean:
-                fallback_ean = item.get("ean", item.get("gtin", ""))
-                if isinstance(fallback_ean, dict):
-                    ean = fallback_ean.get("value", fallback_ean.get("code", ""))
-                else:
-                    ean = str(fallback_ean) if fallback_ean else ""
-            
-            # Prices - handle different structures
-            price_data = item.get("priceData", {})
-            if isinstance(price_data, list):
-                price_data = price_data[0] if price_data else {}
-            
-            # Debug price structure (removed)
-            
-            
-            prices = price_data.get("prices", {}) if isinstance(price_data, dict) else {}
-            if isinstance(prices, list):
-                prices = prices[0] if prices else {}
-            
-            price = 0.0
-            price_per_liter = 0.0
-            
-            if isinstance(prices, dict):
-                # New structure: prices.value.centAmount
-                value = prices.get("value", {})
-                if isinstance(value, dict):
-                    price = float(value.get("centAmount", 0) or 0)
-                    price_per_liter = float(value.get("centUnitAmount", 0) or 0)
-                
-                # Fallback to old structure
-                if price == 0:
-                    price = float(prices.get("price", 0) or 0)
-                if price_per_liter == 0:
-                    price_per_liter = float(prices.get("pricePerUnit", 0) or 0)
-            
-            # Fallback price fields - check priceData directly
-            if price == 0 and isinstance(price_data, dict):
-                price = float(price_data.get("price", 0) or 0)
-                if price == 0:
-                    price = float(price_data.get("unitPrice", 0) or 0)
-            
-            # Fallback to item level
-            if price == 0:
-                price = float(item.get("price", item.get("unitPrice", 0)) or 0)
-            if price_per_liter == 0:
-                price_per_liter = float(item.get("pricePerUnit", item.get("referencePrice", 0)) or 0)
-            
-            # Skip if no valid price
+            price = _first_number(item, self.PRICE_PATHS)
             if price == 0:
                 return None
-            
-            # Discount price
-            discount_price = None
-            discount_percent = None
-            offers = price_data.get("offers", []) if isinstance(price_data, dict) else []
-            if offers and isinstance(offers, list) and len(offers) > 0:
-                offer = offers[0]
-                if isinstance(offer, dict):
-                    discount_price = float(offer.get("price", 0) or 0)
-                    if price > 0 and discount_price > 0:
-                        discount_percent = int((1 - discount_price / price) * 100)
-            
-            # URL and image
-            slug = product_data.get("slug", "") if isinstance(product_data, dict) else ""
-            if isinstance(slug, dict):
-                slug = slug.get("value", slug.get("url", ""))
-            slug = str(slug) if slug else ""
-            
-            if not slug:
-                fallback_slug = item.get("slug", item.get("url", ""))
-                if isinstance(fallback_slug, dict):
-                    slug = fallback_slug.get("value", "")
-                else:
-                    slug = str(fallback_slug) if fallback_slug else ""
-            
-            url = f"https://tienda.consum.es/es/p/{slug}/{product_id}" if slug else f"https://tienda.consum.es/es/p/{product_id}"
-            
-            # Image: prefer media[] array (Consum moved images there, imageURL now 404)
-            image_url = ""
-            media_list = item.get("media", [])
-            if isinstance(media_list, list) and media_list:
-                first_media = media_list[0]
-                if isinstance(first_media, dict):
-                    image_url = first_media.get("url", "")
-            if not image_url and isinstance(product_data, dict):
-                img = product_data.get("imageURL", product_data.get("image", ""))
-                if isinstance(img, dict):
-                    image_url = img.get("url", img.get("src", ""))
-                else:
-                    image_url = str(img) if img else ""
-            if not image_url:
-                fallback_img = item.get("imageURL", item.get("image", item.get("thumbnail", "")))
-                if isinstance(fallback_img, dict):
-                    image_url = fallback_img.get("url", fallback_img.get("src", ""))
-                else:
-                    image_url = str(fallback_img) if fallback_img else ""
-            
-            # Extract region from name
-            region = self._extract_region(name)
-            
-            return Wine(
-                id=f"consum_{product_id}",
-                name=name,
-                brand=brand,
-                price=price,
-                price_per_liter=price_per_liter,
-                store=Store.CONSUM.value,
-                url=url,
-                image_url=image_url,
-                ean=ean,
-                region=region,
-                wine_type=self._extract_wine_type(name),
-                discount_price=discount_price,
-                discount_percent=discount_percent
-            )
-        except Exception as e:
-            print(f"Error parsing Consum product: {e}")
+            price_per_liter = _first_number(item, self.PRICE_PER_LITER_PATHS)
+            # float() accepts "NaN"/"inf", which would break the discount maths below
+            if not (math.isfinite(price) and math.isfinite(price_per_liter)):
+                raise ValueError("non-finite price")
+        except (TypeError, ValueError):
+            logger.debug("Skipping Consum product %s: malformed price", item.get("id"))
             return None
-    
-    def _extract_region(self, name: str) -> Optional[str]:
-        """Extract DO region from name"""
-        regions = [
-            "Rioja", "Ribera del Duero", "Rueda", "Rías Baixas",
-            "Priorat", "Penedès", "Jumilla", "Toro", "Navarra",
-            "La Mancha", "Valdepeñas", "Utiel-Requena", "Cariñena"
-        ]
-        name_lower = name.lower()
-        for region in regions:
-            if region.lower() in name_lower:
-                return region
-        return None
-    
-    def _extract_wine_type(self, name: str) -> Optional[str]:
-        """Extract wine type from name"""
-        name_lower = name.lower()
-        if "tinto" in name_lower:
-            return WineType.TINTO.value
-        elif "blanco" in name_lower:
-            return WineType.BLANCO.value
-        elif "rosado" in name_lower:
-            return WineType.ROSADO.value
-        elif "cava" in name_lower:
-            return WineType.CAVA.value
-        elif "espumoso" in name_lower:
-            return WineType.ESPUMOSO.value
-        return None
+        
+        product_id = str(item.get("id", ""))
+        name = _first_text(item, self.NAME_PATHS)
+        brand = _first_text(item, self.BRAND_PATHS)
+        ean = _first_text(item, self.EAN_PATHS)
+        
+        # priceData can be dict or list
+        price_data = item.get("priceData", {})
+        if isinstance(price_data, list):
+            price_data = price_data[0] if price_data else {}
+        
+        # Discount price
+        discount_price = None
+        discount_percent = None
+        offers = price_data.get("offers", []) if isinstance(price_data, dict) else []
+        if offers and isinstance(offers, list) and isinstance(offers[0], dict):
+            try:
+                discount_price = float(offers[0].get("price", 0) or 0)
+            except (TypeError, ValueError):
+                discount_price = None
+            if discount_price is not None and not math.isfinite(discount_price):
+                discount_price = None
+            # Only a real markdown has a percent; outside this range the ratio can overflow int()
+            if discount_price is not None and 0 < discount_price < price:
+                discount_percent = int((1 - discount_price / price) * 100)
+        
+        # URL and image
+        slug = _first_text(item, self.SLUG_PATHS)
+        url = f"https://tienda.consum.es/es/p/{slug}/{product_id}" if slug else f"https://tienda.consum.es/es/p/{product_id}"
+        image_url = _first_text(item, self.IMAGE_PATHS)
+        
+        # Extract region from name
+        region = _extract_region(name)
+        
+        return Wine(
+            id=f"consum_{product_id}",
+            name=name,
+            brand=brand,
+            price=price,
+            price_per_liter=price_per_liter,
+            store=Store.CONSUM.value,
+            url=url,
+            image_url=image_url,
+            ean=ean,
+            region=region,
+            wine_type=_extract_wine_type(name),
+            discount_price=discount_price,
+            discount_percent=discount_percent
+        )
 
 
 class MercadonaParser:
@@ -343,120 +439,129 @@ class MercadonaParser:
         "malaga": "agp1",
     }
     
+    # Only the fields _parse_hit reads; drops _highlightResult and the rest of each hit
+    HIT_ATTRIBUTES = ("id", "display_name", "brand", "price_instructions", "share_url", "thumbnail")
+    
     def __init__(self, warehouse: str = "vlc1"):
         self.warehouse = warehouse
         self.index = f"products_prod_{warehouse}_es"
-        self.base_url = f"https://{self.ALGOLIA_APP_ID}-dsn.algolia.net/1/indexes/{self.index}/query"
+        self.queries_url = f"https://{self.ALGOLIA_APP_ID}-dsn.algolia.net/1/indexes/*/queries"
         
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = _SESSION
+        self.headers = {
             "Content-Type": "application/json",
             "x-algolia-api-key": self.ALGOLIA_API_KEY,
             "x-algolia-application-id": self.ALGOLIA_APP_ID,
-        })
+        }
     
     def search_wines(self, wine_type: WineType = WineType.TINTO, limit: int = 50, custom_query: str = None) -> list[Wine]:
         """Search wines by type or custom query"""
         query = custom_query if custom_query else f"vino {wine_type.value}"
-        
-        payload = {
-            "query": query,
+        return self.search_wines_batch([query], limit)[0]
+    
+    def search_wines_multi(self, wine_types: list[WineType], limit: int = 50) -> list[Wine]:
+        """Search several wine types with one Algolia multi-query request"""
+        results = self.search_wines_batch([f"vino {wt.value}" for wt in wine_types], limit)
+        return [w for wines in results for w in wines]
+    
+    def search_wines_batch(self, queries: list[str], limit: int = 50) -> list[list[Wine]]:
+        """Run several queries in one POST to Algolia's /1/indexes/*/queries; one list per query"""
+        search_params = {
             "hitsPerPage": limit,
-            "page": 0
+            "page": 0,
+            "attributesToRetrieve": json.dumps(self.HIT_ATTRIBUTES, separators=(",", ":")),
+            "attributesToHighlight": "[]",
+            "responseFields": '["hits"]',
+        }
+        payload = {
+            "requests": [
+                {"indexName": self.index, "params": urlencode({"query": q, **search_params})}
+                for q in queries
+            ]
         }
         
         try:
-            response = self.session.post(self.base_url, json=payload)
+            response = self.session.post(self.queries_url, json=payload, headers=self.headers, timeout=15)
             response.raise_for_status()
-            data = response.json()
-            
-            wines = []
-            hits = data.get("hits", [])
-            for hit in hits:
-                wine = self._parse_hit(hit)
-                if wine:
-                    wines.append(wine)
-            
-            print(f"✅ Mercadona: {len(wines)} wines (from {len(hits)} hits)")
-            return wines
+            # An empty body decodes to nothing; the padding below fills every query
+            data = _loads(response.content) if response.content else {}
+            if not isinstance(data, dict):
+                # Error pages and proxies can answer with arrays, strings or null
+                logger.error("Mercadona parsing error: unexpected %s body", type(data).__name__)
+                return [[] for _ in queries]
+            results = data.get("results")
+            if not isinstance(results, list):
+                results = []
+            
+            batches = []
+            for query, result in zip(queries, results):
+                hits = result.get("hits") if isinstance(result, dict) else None
+                if not isinstance(hits, list):
+                    hits = []
+                wines = [w for w in map(self._parse_hit, hits) if w]
+                logger.info("Mercadona '%s': %d wines (from %d hits)", query, len(wines), len(hits))
+                batches.append(wines)
+            # Pad so callers always get one list per query
+            return batches + [[] for _ in queries[len(batches):]]
             
         except requests.RequestException as e:
-            print(f"❌ Mercadona API error: {e}")
-            return []
+            logger.error("Mercadona API error: %s", e)
+        except ValueError as e:
+            logger.error("Mercadona parsing error: %s", e)
+        return [[] for _ in queries]
     
     def _parse_hit(self, hit: dict) -> Optional[Wine]:
         """Unified wine data structure"""
         try:
-            product_id = str(hit.get("id", ""))
-            name = hit.get("display_name", "")
-            brand = hit.get("brand", "")
-            
-            # Prices
-            price_info = hit.get("price_instructions", {})
-            price = float(price_info.get("unit_price", 0))
-            price_per_liter = float(price_info.get("reference_price", 0))
-            
-            # Discount
-            discount_price = None
-            discount_percent = None
-            previous_price = price_info.get("previous_unit_price")
-            if previous_price:
-                discount_price = price
-                price = float(previous_price)
-                discount_percent = int((1 - discount_price / price) * 100)
-            
-            # URL
-            url = hit.get("share_url", f"https://tienda.mercadona.es/product/{product_id}")
-            
-            # Image
-            image_url = hit.get("thumbnail", "")
-            
-            return Wine(
-                id=f"mercadona_{product_id}",
-                name=name,
-                brand=brand,
-                price=price,
-                price_per_liter=price_per_liter,
-                store=Store.MERCADONA.value,
-                url=url,
-                image_url=image_url,
-                # EAN code
-                region=self._extract_region(name),
-                wine_type=self._extract_wine_type(name),
-                discount_price=discount_price,
-                discount_percent=discount_percent
-            )
-        except Exception as e:
-            print(f"Error parsing Mercadona hit: {e}")
+            # Fields every Algolia product hit carries; a hit without them is skipped
+            product_id = str(hit["id"])
+            name = hit["display_name"]
+            price_info = hit["price_instructions"]
+            price = float(price_info["unit_price"])
+            price_per_liter = float(price_info.get("reference_price") or 0)
+            previous_price = float(price_info.get("previous_unit_price") or 0)
+            # A null name or a "NaN"/"inf" price would otherwise fail later, outside this guard
+            if not isinstance(name, str):
+                raise TypeError("display_name is not a string")
+            if not all(map(math.isfinite, (price, price_per_liter, previous_price))):
+                raise ValueError("non-finite price")
+        except (KeyError, TypeError, ValueError, AttributeError):
+            logger.debug("Skipping malformed Mercadona hit %s", hit.get("id") if isinstance(hit, dict) else hit)
             return None
-    
-    def _extract_region(self, name: str) -> Optional[str]:
-        """Extract DO region from name"""
-        regions = [
-            "Rioja", "Ribera del Duero", "Rueda", "Rías Baixas",
-            "Priorat", "Penedès", "Jumilla", "Toro", "Navarra",
-            "La Mancha", "Valdepeñas", "Utiel-Requena", "Cariñena"
-        ]
-        name_lower = name.lower()
-        for region in regions:
-            if region.lower() in name_lower:
-                return region
-        return None
-    
-    def _extract_wine_type(self, name: str) -> Optional[str]:
-        """Extract wine type from name"""
-        name_lower = name.lower()
-        if "tinto" in name_lower:
-            return WineType.TINTO.value
-        elif "blanco" in name_lower:
-            return WineType.BLANCO.value
-        elif "rosado" in name_lower:
-            return WineType.ROSADO.value
-        elif "cava" in name_lower:
-            return WineType.CAVA.value
-        elif "espumoso" in name_lower:
-            return WineType.ESPUMOSO.value
-        return None
+        
+        brand = hit.get("brand", "")
+        
+        # Discount
+        discount_price = None
+        discount_percent = None
+        if previous_price > 0:
+            discount_price = price
+            price = previous_price
+            # Only a real markdown has a percent; outside this range the ratio can overflow int()
+            if 0 < discount_price < price:
+                discount_percent = int((1 - discount_price / price) * 100)
+        
+        # URL
+        url = hit.get("share_url", f"https://tienda.mercadona.es/product/{product_id}")
+        
+        # Image
+        image_url = hit.get("thumbnail", "")
+        
+        return Wine(
+            id=f"mercadona_{product_id}",
+            name=name,
+            brand=brand,
+            price=price,
+            price_per_liter=price_per_liter,
+            store=Store.MERCADONA.value,
+            url=url,
+            image_url=image_url,
+            # EAN code
+            region=_extract_region(name),
+            wine_type=_extract_wine_type(name),
+            discount_price=discount_price,
+            discount_percent=discount_percent
+        )
 
 
 class MasymasParser:
@@ -482,14 +587,14 @@ class MasymasParser:
     
     def __init__(self, postal_code: str = "46001"):
         self.postal_code = postal_code
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = _SESSION
+        self.headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
             "Accept": "application/json",
             "Accept-Language": "es-ES,es;q=0.9",
             "Referer": "https://tienda.masymas.com/es",
             "Origin": "https://tienda.masymas.com",
-        })
+        }
     
     def search_wines(self, wine_type: WineType = WineType.TINTO, limit: int = 50, custom_query: str = None) -> list[Wine]:
         """Search wines by type via Masymas REST API"""
@@ -504,68 +609,62 @@ class MasymasParser:
         }
         
         try:
-            response = self.session.get(self.API_URL, params=params, timeout=15)
-            print(f"🔍 Masymas: status={response.status_code}, url={response.url}")
-            response.raise_for_status()
-            data = response.json()
-            
-            wines = []
-            catalog = data.get("catalog", {})
-            
-            if not isinstance(catalog, dict):
-                print(f"⚠️ Masymas: unexpected catalog type: {type(catalog)}, keys: {list(data.keys()) if isinstance(data, dict) else 'not dict'}")
-                return []
-            
-            products = catalog.get("products", [])
-            total_count = catalog.get("totalCount", 0)
-            print(f"🔍 Masymas: totalCount={total_count}, products in response={len(products)}")
-            
-            for item in products:
-                wine = self._parse_product(item, wine_type)
-                if wine:
-                    wines.append(wine)
-                else:
-                    # Debug: why was product skipped?
-                    pid = item.get("id", "?")
-                    pname = item.get("productData", {}).get("name", "?") if isinstance(item.get("productData"), dict) else "?"
-                    pd = item.get("priceData", {})
-                    prices = pd.get("prices", []) if isinstance(pd, dict) else []
-                    price_val = 0
-                    for p in prices:
-                        if isinstance(p, dict) and p.get("id") == "PRICE":
-                            v = p.get("value", {})
-                            price_val = v.get("centAmount", 0) if isinstance(v, dict) else 0
-                    print(f"⚠️ Masymas: skipped product id={pid} name='{pname}' price={price_val}")
-            
-            print(f"✅ Masymas: {len(wines)} wines (from {len(products)} products)")
-            return wines
+            return _get_wines(
+                self.session, self.API_URL, params, self.headers,
+                lambda response: self._parse_response(response, wine_type),
+                variant=wine_type,
+            )
             
         except requests.RequestException as e:
-            print(f"❌ Masymas API error: {e}")
+            logger.error("Masymas API error: %s", e)
             return []
         except Exception as e:
-            print(f"❌ Masymas parsing error: {e}")
+            logger.error("Masymas parsing error: %s", e)
             return []
     
+    def _parse_response(self, response, wine_type: WineType) -> list[Wine]:
+        """Parse a search response into wines"""
+        data = _loads(response.content)
+        
+        catalog = data.get("catalog", {})
+        
+        if not isinstance(catalog, dict):
+            logger.warning(
+                "Masymas: unexpected catalog type: %s, keys: %s",
+                type(catalog), list(data.keys()) if isinstance(data, dict) else "not dict",
+            )
+            return []
+        
+        products = catalog.get("products", [])
+        total_count = catalog.get("totalCount", 0)
+        logger.debug("Masymas: totalCount=%s, products in response=%d", total_count, len(products))
+        
+        parsed = [self._parse_product(item, wine_type) for item in products]
+        wines = [w for w in parsed if w]
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            # Debug: why were products skipped?
+            for item, wine in zip(products, parsed):
+                if wine:
+                    continue
+                pid = item.get("id", "?")
+                pname = item.get("productData", {}).get("name", "?") if isinstance(item.get("productData"), dict) else "?"
+                pd = item.get("priceData", {})
+                prices = pd.get("prices", []) if isinstance(pd, dict) else []
+                price_val = 0
+                for p in prices:
+                    if isinstance(p, dict) and p.get("id") == "PRICE":
+                        v = p.get("value", {})
+                        price_val = v.get("centAmount", 0) if isinstance(v, dict) else 0
+                logger.debug("Masymas: skipped product id=%s name='%s' price=%s", pid, pname, price_val)
+        
+        logger.info("Masymas: %d wines (from %d products)", len(wines), len(products))
+        return wines
+    
     def _parse_product(self, item: dict, search_type: WineType) -> Optional[Wine]:
         """Parse Masymas API product into Wine object"""
         try:
-            product_id = str(item.get("id", ""))
-            ean = str(item.get("ean", "")) or None
-            
-            product_data = item.get("productData", {})
-            if not isinstance(product_data, dict):
-                return None
-            
-            name = str(product_data.get("name", ""))
-            if not name:
-                return None
-            
-            # Brand
-            brand_data = product_data.get("brand", {})
-            brand = brand_data.get("name", "") if isinstance(brand_data, dict) else str(brand_data)
-            
-            # Prices
+            # Prices first: unpriced products are rejected before any other field work
             price_data = item.get("priceData", {})
             prices = price_data.get("prices", []) if isinstance(price_data, dict) else []
             
@@ -591,6 +690,21 @@ class MasymasParser:
             if price == 0:
                 return None
             
+            product_id = str(item.get("id", ""))
+            ean = str(item.get("ean", "")) or None
+            
+            product_data = item.get("productData", {})
+            if not isinstance(product_data, dict):
+                return None
+            
+            name = str(product_data.get("name", ""))
+            if not name:
+                return None
+            
+            # Brand
+            brand_data = product_data.get("brand", {})
+            brand = brand_data.get("name", "") if isinstance(brand_data, dict) else str(brand_data)
+            
             # Calculate discount percent
             if discount_price and discount_price > 0 and price > discount_price:
                 discount_percent = int((1 - discount_price / price) * 100)
@@ -609,15 +723,15 @@ class MasymasParser:
                 cat_name = cat.get("name", "") if isinstance(cat, dict) else ""
                 if "D.O." in cat_name or "D.o." in cat_name:
                     # Extract DO name: "D.O. Rioja" -> "Rioja"
-                    region = cat_name.replace("D.O. ", "").replace("D.o. ", "").strip()
+                    region = sys.intern(cat_name.replace("D.O. ", "").replace("D.o. ", "").strip())
                     break
             
             # Fallback: extract region from name
             if not region:
-                region = self._extract_region(name)
+                region = _extract_region(name, _MASYMAS_REGIONS)
             
             # Wine type from name or search context
-            wine_type = self._extract_wine_type(name)
+            wine_type = _extract_wine_type(name)
             if not wine_type:
                 wine_type = search_type.value
             
@@ -637,38 +751,57 @@ class MasymasParser:
                 discount_percent=discount_percent,
             )
         except Exception as e:
-            print(f"Error parsing Masymas product: {e}")
+            logger.debug("Error parsing Masymas product: %s", e)
             return None
-    
-    def _extract_region(self, name: str) -> Optional[str]:
-        """Extract DO region from wine name"""
-        regions = [
-            "Rioja", "Ribera del Duero", "Rueda", "Rías Baixas",
-            "Priorat", "Penedès", "Jumilla", "Toro", "Navarra",
-            "La Mancha", "Valdepeñas", "Utiel-Requena", "Cariñena",
-            "Somontano", "Campo de Borja", "Bierzo", "Yecla",
-            "Valdeorras", "Alicante", "Valencia",
-        ]
-        name_lower = name.lower()
-        for region in regions:
-            if region.lower() in name_lower:
-                return region
-        return None
-    
-    def _extract_wine_type(self, name: str) -> Optional[str]:
-        """Extract wine type from name"""
-        name_lower = name.lower()
-        if "tinto" in name_lower:
-            return WineType.TINTO.value
-        elif "blanco" in name_lower:
-            return WineType.BLANCO.value
-        elif "rosado" in name_lower:
-            return WineType.ROSADO.value
-        elif "cava" in name_lower:
-            return WineType.CAVA.value
-        elif "espumoso" in name_lower:
-            return WineType.ESPUMOSO.value
-        return None
+
+
+# DIA card text: "4,72 €", "(6,29 €/LITRO)", "25% dto."
+_PCT_RE = re.compile(r"(\d+)%")
+_PRICE_NUM_RE = re.compile(r"\d+[.,]\d+")
+_INT_RE = re.compile(r"\d+")
+
+# DIA names: "Vino tinto crianza D.O. Rioja Campo viejo botella 75 cl"
+_DO_NAME_RE = re.compile(r'D\.O\.?\s+([A-Za-záéíóúñÁÉÍÓÚÑ\s]+?)(?:\s+(?:botella|brik|bag|pack)|$)')
+_VOLUME_STRIP_RE = re.compile(r'\s*(botella|brik|bag|pack)\s+\d+.*$', re.IGNORECASE)
+# D.O. plus region words up to the next capitalised word (brand) or the end.
+# Word-by-word with possessive quantifiers so whitespace runs can't backtrack
+# quadratically; the second branch keeps the old match for whitespace-only tails.
+_DO_STRIP_RE = re.compile(
+    r'D\.O\.?(?:\s++[A-Za-záéíóúñÁÉÍÓÚÑ]++(?:\s++(?![A-Z])[A-Za-záéíóúñÁÉÍÓÚÑ]++)*+(?=\s+[A-Z]|\s*$)'
+    r'|\s{2,}(?=\s[A-Z]|$))'
+)
+_TYPE_PREFIX_RE = re.compile(
+    r'^Vino\s+(tinto|blanco|rosado|espumoso)\s*(crianza|reserva|gran reserva|joven|roble)?\s*', re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=4096)
+def _extract_dia_region(name: str) -> Optional[str]:
+    """Extract DO region from a DIA name, falling back to the D.O. pattern"""
+    region = _extract_region(name, _DIA_REGIONS)
+    if region:
+        return region
+    # Check for "D.O." pattern
+    do_match = _DO_NAME_RE.search(name)
+    if do_match:
+        return sys.intern(do_match.group(1).strip())
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _extract_dia_brand(name: str) -> str:
+    """Extract brand from DIA wine name
+    Typical format: 'Vino tinto crianza D.O. Rioja Campo viejo botella 75 cl'
+    Brand is usually after the region/type: 'Campo viejo'
+    """
+    # Remove volume info at the end
+    clean = _VOLUME_STRIP_RE.sub('', name)
+    # Remove D.O. + region
+    clean = _DO_STRIP_RE.sub('', clean)
+    # Remove wine type descriptors at the beginning
+    clean = _TYPE_PREFIX_RE.sub('', clean)
+    brand = clean.strip()
+    return brand if brand else name.split()[0] if name else "DIA"
 
 
 class DIAParser:
@@ -692,19 +825,17 @@ class DIAParser:
     
     def __init__(self, postal_code: str = "46001"):
         self.postal_code = postal_code
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = _SESSION
+        self.headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "es-ES,es;q=0.9",
-        })
+        }
     
     def search_wines(self, wine_type: WineType = WineType.TINTO, limit: int = 50, custom_query: str = None) -> list[Wine]:
         """Search wines by scraping DIA search results page"""
-        try:
-            from bs4 import BeautifulSoup
-        except ImportError:
-            print("❌ DIA: beautifulsoup4 not installed, run: pip install beautifulsoup4")
+        if BeautifulSoup is None:
+            logger.error("DIA: beautifulsoup4 not installed, run: pip install beautifulsoup4")
             return []
         
         query = custom_query if custom_query else f"vino {wine_type.value}"
@@ -712,35 +843,48 @@ class DIAParser:
         params = {"q": query}
         
         try:
-            response = self.session.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            wines = []
-            
-            # Find all product list items
-            items = soup.select('[data-test-id="search-product-card-list-item"]')
-            
-            for item in items[:limit]:
-                wine = self._parse_card(item, wine_type)
-                if wine:
-                    wines.append(wine)
-            
-            print(f"✅ DIA: {len(wines)} wines (from {len(items)} cards)")
-            return wines
+            return _get_wines(
+                self.session, url, params, self.headers,
+                lambda response: self._parse_response(response, wine_type, limit),
+                variant=(wine_type, limit),
+            )
             
         except requests.RequestException as e:
-            print(f"❌ DIA scraping error: {e}")
+            logger.error("DIA scraping error: %s", e)
             return []
         except Exception as e:
-            print(f"❌ DIA parsing error: {e}")
+            logger.error("DIA parsing error: %s", e)
             return []
     
+    def _parse_response(self, response, wine_type: WineType, limit: int) -> list[Wine]:
+        """Parse a search results page into wines"""
+        # Only product cards are turned into tree nodes; the rest of the page is skipped
+        cards_only = SoupStrainer(attrs={"data-test-id": "search-product-card-list-item"})
+        soup = BeautifulSoup(response.content, _HTML_PARSER, parse_only=cards_only, from_encoding=response.encoding)
+        
+        # Find all product list items
+        items = soup.select('[data-test-id="search-product-card-list-item"]')
+        
+        wines = [w for w in (self._parse_card(item, wine_type) for item in items[:limit]) if w]
+        
+        logger.info("DIA: %d wines (from %d cards)", len(wines), len(items))
+        return wines
+    
     def _parse_card(self, item, search_type: WineType) -> Optional[Wine]:
         """Parse a DIA product card HTML element into Wine object"""
         try:
+            # One sweep over the card; reversed so the first element per test id wins
+            fields = {el["data-test-id"]: el for el in reversed(item.find_all(attrs={"data-test-id": True}))}
+            
+            # Price first: cards without one are skipped before anything else
+            price_el = fields.get("search-product-card-unit-price")
+            price = self._parse_price(price_el.get_text(strip=True) if price_el else "")
+            
+            if price == 0:
+                return None
+            
             # Name and URL
-            name_el = item.select_one('[data-test-id="search-product-card-name"]')
+            name_el = fields.get("search-product-card-name")
             if not name_el:
                 return None
             
@@ -758,7 +902,7 @@ class DIAParser:
             product_url = f"{self.BASE_URL}{href}" if href.startswith("/") else href
             
             # Image
-            img_el = item.select_one('[data-test-id="search-product-card-image"]')
+            img_el = fields.get("search-product-card-image")
             image_url = None
             if img_el:
                 img_src = img_el.get("src", "")
@@ -767,15 +911,8 @@ class DIAParser:
                 elif img_src:
                     image_url = img_src
             
-            # Price
-            price_el = item.select_one('[data-test-id="search-product-card-unit-price"]')
-            price = self._parse_price(price_el.get_text(strip=True) if price_el else "")
-            
-            if price == 0:
-                return None
-            
             # Per-liter price
-            kilo_el = item.select_one('[data-test-id="search-product-card-kilo-price"]')
+            kilo_el = fields.get("search-product-card-kilo-price")
             price_per_liter = 0.0
             if kilo_el:
                 kilo_text = kilo_el.get_text(strip=True)
@@ -786,8 +923,8 @@ class DIAParser:
             discount_price = None
             discount_percent = None
             
-            strike_el = item.select_one('[data-test-id="product-special-offer-discount-percentage-strikethrough-price"]')
-            discount_el = item.select_one('[data-test-id="product-special-offer-discount-percentage-discount"]')
+            strike_el = fields.get("product-special-offer-discount-percentage-strikethrough-price")
+            discount_el = fields.get("product-special-offer-discount-percentage-discount")
             
             if strike_el and discount_el:
                 original_price = self._parse_price(strike_el.get_text(strip=True))
@@ -796,21 +933,20 @@ class DIAParser:
                     price = original_price  # original price becomes the main price
                     discount_text = discount_el.get_text(strip=True)
                     # Format: "25% dto."
-                    import re
-                    pct_match = re.search(r'(\d+)%', discount_text)
+                    pct_match = _PCT_RE.search(discount_text)
                     if pct_match:
                         discount_percent = int(pct_match.group(1))
                     else:
                         discount_percent = int((1 - discount_price / price) * 100)
             
             # Extract region and wine type from name
-            region = self._extract_region(name)
-            wine_type = self._extract_wine_type(name)
+            region = _extract_dia_region(name)
+            wine_type = _extract_wine_type(name)
             if not wine_type:
                 wine_type = search_type.value
             
             # Extract brand from name (first part before D.O. or type keywords)
-            brand = self._extract_brand(name)
+            brand = _extract_dia_brand(name)
             
             return Wine(
                 id=f"dia_{product_id}",
@@ -828,69 +964,17 @@ class DIAParser:
                 discount_percent=discount_percent,
             )
         except Exception as e:
-            print(f"Error parsing DIA card: {e}")
+            logger.debug("Error parsing DIA card: %s", e)
             return None
     
     def _parse_price(self, text: str) -> float:
         """Parse Spanish price format: '4,72 €' -> 4.72"""
-        import re
-        match = re.search(r'(\d+[.,]\d+)', text)
-        if match:
-            return float(match.group(1).replace(",", "."))
-        match = re.search(r'(\d+)', text)
-        if match:
-            return float(match.group(1))
-        return 0.0
-    
-    def _extract_region(self, name: str) -> Optional[str]:
-        """Extract DO region from wine name"""
-        regions = [
-            "Rioja", "Ribera del Duero", "Rueda", "Rías Baixas",
-            "Priorat", "Penedès", "Jumilla", "Toro", "Navarra",
-            "La Mancha", "Valdepeñas", "Utiel-Requena", "Cariñena",
-            "Somontano", "Campo de Borja", "Bierzo", "Yecla",
-            "Valdeorras", "Castilla La Mancha", "Valencia", "Alicante",
-        ]
-        name_lower = name.lower()
-        for region in regions:
-            if region.lower() in name_lower:
-                return region
-        # Check for "D.O." pattern
-        import re
-        do_match = re.search(r'D\.O\.?\s+([A-Za-záéíóúñÁÉÍÓÚÑ\s]+?)(?:\s+(?:botella|brik|bag|pack)|$)', name)
-        if do_match:
-            return do_match.group(1).strip()
-        return None
-    
-    def _extract_wine_type(self, name: str) -> Optional[str]:
-        """Extract wine type from name"""
-        name_lower = name.lower()
-        if "tinto" in name_lower:
-            return WineType.TINTO.value
-        elif "blanco" in name_lower:
-            return WineType.BLANCO.value
-        elif "rosado" in name_lower:
-            return WineType.ROSADO.value
-        elif "cava" in name_lower:
-            return WineType.CAVA.value
-        elif "espumoso" in name_lower:
-            return WineType.ESPUMOSO.value
-        return None
-    
-    def _extract_brand(self, name: str) -> str:
-        """Extract brand from DIA wine name
-        Typical format: 'Vino tinto crianza D.O. Rioja Campo viejo botella 75 cl'
-        Brand is usually after the region/type: 'Campo viejo'
-        """
-        import re
-        # Remove volume info at the end
-        clean = re.sub(r'\s*(botella|brik|bag|pack)\s+\d+.*$', '', name, flags=re.IGNORECASE)
-        # Remove D.O. + region
-        clean = re.sub(r'D\.O\.?\s+[A-Za-záéíóúñÁÉÍÓÚÑ\s]+?(?=\s+[A-Z]|\s*$)', '', clean)
-        # Remove wine type descriptors at the beginning
-        clean = re.sub(r'^Vino\s+(tinto|blanco|rosado|espumoso)\s*(crianza|reserva|gran reserva|joven|roble)?\s*', '', clean, flags=re.IGNORECASE)
-        brand = clean.strip()
-        return brand if brand else name.split()[0] if name else "DIA"
+        match = _PRICE_NUM_RE.search(text) or _INT_RE.search(text)
+        return float(match[0].replace(",", ".")) if match else 0.0
+
+
+# Condis price-per-unit field: "9,53€/Litro"
+_PUM_RE = re.compile(r'([\d,]+)')
 
 
 class CondisParser:
@@ -912,13 +996,30 @@ class CondisParser:
     STORE_ID = "718"
     SITE_URL = "https://compraonline.condis.es"
 
+    # Keywords in the variety field -> canonical D.O. region
+    VARIETY_REGIONS = {
+        "rioja": "Rioja",
+        "ribera": "Ribera del Duero",
+        "rueda": "Rueda",
+        "rias baixas": "R\u00EDas Baixas",
+        "priorat": "Priorat",
+        "pened\u00E8s": "Pened\u00E8s",
+        "penedes": "Pened\u00E8s",
+        "catalanas": "Cataluña",
+        "jumilla": "Jumilla",
+        "toro": "Toro",
+        "navarra": "Navarra",
+        "somontano": "Somontano",
+        "campo de borja": "Campo de Borja",
+    }
+
     def __init__(self, postal_code: str = "46001"):
         self.postal_code = postal_code
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = _SESSION
+        self.headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
             "Accept": "application/json",
-        })
+        }
 
     def search_wines(self, wine_type: WineType = WineType.TINTO, limit: int = 50, custom_query: str = None) -> list[Wine]:
         """Search wines via Empathy.co API"""
@@ -933,29 +1034,30 @@ class CondisParser:
         }
 
         try:
-            response = self.session.get(self.EMPATHY_URL, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-
-            wines = []
-            catalog = data.get("catalog", {})
-            docs = catalog.get("content", [])
-
-            for doc in docs:
-                wine = self._parse_doc(doc, wine_type)
-                if wine:
-                    wines.append(wine)
-
-            print(f"\u2705 Condis: {len(wines)} wines (from {len(docs)} docs)")
-            return wines
+            return _get_wines(
+                self.session, self.EMPATHY_URL, params, self.headers,
+                lambda response: self._parse_response(response, wine_type),
+                variant=wine_type,
+            )
 
         except requests.RequestException as e:
-            print(f"\u274C Condis API error: {e}")
+            logger.error("Condis API error: %s", e)
             return []
         except Exception as e:
-            print(f"\u274C Condis parsing error: {e}")
+            logger.error("Condis parsing error: %s", e)
             return []
 
+    def _parse_response(self, response, wine_type: WineType) -> list[Wine]:
+        """Parse a search response into wines"""
+        data = _loads(response.content)
+
+        catalog = data.get("catalog", {})
+        docs = catalog.get("content", [])
+        wines = [w for w in (self._parse_doc(doc, wine_type) for doc in docs) if w]
+
+        logger.info("Condis: %d wines (from %d docs)", len(wines), len(docs))
+        return wines
+
     def _parse_doc(self, doc: dict, search_type: WineType) -> Optional[Wine]:
         """Parse Empathy.co search result into Wine object"""
         try:
@@ -996,8 +1098,7 @@ class CondisParser:
             price_per_liter = 0.0
             pum = doc.get("pum", "")
             if pum:
-                import re
-                pum_match = re.search(r'([\d,]+)', pum)
+                pum_match = _PUM_RE.search(pum)
                 if pum_match:
                     price_per_liter = float(pum_match.group(1).replace(",", "."))
 
@@ -1014,25 +1115,22 @@ class CondisParser:
                 product_url = f"{self.SITE_URL}/p/{product_id}"
 
             # Region from variety field: "Tintos d.o. catalanas", "Blancos otras d.o."
-            region = None
-            variety = doc.get("variety", "")
-            if variety:
-                region = self._extract_region_from_variety(variety)
+            region = _region_from_keywords(doc.get("variety", ""), self.VARIETY_REGIONS)
             if not region:
-                region = self._extract_region(name)
+                region = _extract_region(name, _CONDIS_REGIONS)
 
             # Wine type
-            wine_type = self._extract_wine_type(name)
+            wine_type = _extract_wine_type(name)
             if not wine_type:
                 # Try from family/category
-                family = doc.get("family", "")
-                if "tinto" in family.lower():
+                family = doc.get("family", "").lower()
+                if "tinto" in family:
                     wine_type = WineType.TINTO.value
-                elif "blanco" in family.lower():
+                elif "blanco" in family:
                     wine_type = WineType.BLANCO.value
-                elif "rosado" in family.lower():
+                elif "rosado" in family:
                     wine_type = WineType.ROSADO.value
-                elif "cava" in family.lower() or "champan" in family.lower():
+                elif "cava" in family or "champan" in family:
                     wine_type = WineType.CAVA.value
                 else:
                     wine_type = search_type.value
@@ -1053,61 +1151,9 @@ class CondisParser:
                 discount_percent=discount_percent,
             )
         except Exception as e:
-            print(f"Error parsing Condis doc: {e}")
+            logger.debug("Error parsing Condis doc: %s", e)
             return None
 
-    def _extract_region_from_variety(self, variety: str) -> Optional[str]:
-        """Extract D.O. region from Condis variety field"""
-        variety_lower = variety.lower()
-        region_map = {
-            "rioja": "Rioja",
-            "ribera": "Ribera del Duero",
-            "rueda": "Rueda",
-            "rias baixas": "R\u00EDas Baixas",
-            "priorat": "Priorat",
-            "pened\u00E8s": "Pened\u00E8s",
-            "penedes": "Pened\u00E8s",
-            "catalanas": "Cataluña",
-            "jumilla": "Jumilla",
-            "toro": "Toro",
-            "navarra": "Navarra",
-            "somontano": "Somontano",
-            "campo de borja": "Campo de Borja",
-        }
-        for key, region in region_map.items():
-            if key in variety_lower:
-                return region
-        return None
-
-    def _extract_region(self, name: str) -> Optional[str]:
-        """Extract DO region from wine name"""
-        regions = [
-            "Rioja", "Ribera del Duero", "Rueda", "R\u00EDas Baixas",
-            "Priorat", "Pened\u00E8s", "Jumilla", "Toro", "Navarra",
-            "La Mancha", "Valdepe\u00F1as", "Utiel-Requena", "Cari\u00F1ena",
-            "Somontano", "Campo de Borja", "Bierzo", "Yecla",
-        ]
-        name_lower = name.lower()
-        for region in regions:
-            if region.lower() in name_lower:
-                return region
-        return None
-
-    def _extract_wine_type(self, name: str) -> Optional[str]:
-        """Extract wine type from name"""
-        name_lower = name.lower()
-        if "tinto" in name_lower:
-            return WineType.TINTO.value
-        elif "blanco" in name_lower:
-            return WineType.BLANCO.value
-        elif "rosado" in name_lower:
-            return WineType.ROSADO.value
-        elif "cava" in name_lower:
-            return WineType.CAVA.value
-        elif "espumoso" in name_lower:
-            return WineType.ESPUMOSO.value
-        return None
-
 
 class FroizParser:
     """
@@ -1119,13 +1165,40 @@ class FroizParser:
     IMAGE_CDN = "https://froiz.com/cdn-cgi/imagedelivery/laxGYDNZyT04iZVpzPzryw"
     SITE_URL = "https://supermercado.froiz.com"
 
+    # Non-wine products that show up in "vino" searches
+    EXCLUDE_WORDS = (
+        "vinagre", "sangr\u00EDa", "mosto", "refresco", "zumo",
+        "cafe", "capsula", "nespresso", "pimienta", "pimiento", "especias",
+        "jamon", "queso", "aceite", "sal ", "azucar",
+    )
+
+    # Keywords in family_name -> canonical D.O. region
+    FAMILY_REGIONS = {
+        "rioja": "Rioja",
+        "ribera del duero": "Ribera del Duero",
+        "rias baixas": "R\u00EDas Baixas",
+        "ribeiro": "Ribeiro",
+        "rueda": "Rueda",
+        "valdeorras": "Valdeorras",
+        "bierzo": "Bierzo",
+        "la mancha": "La Mancha",
+        "somontano": "Somontano",
+        "jumilla": "Jumilla",
+        "toro": "Toro",
+        "cigales": "Cigales",
+        "navarra": "Navarra",
+        "valdepe\u00F1as": "Valdepe\u00F1as",
+        "priorat": "Priorat",
+        "pened\u00E8s": "Pened\u00E8s",
+    }
+
     def __init__(self, postal_code: str = "36005"):
         self.postal_code = postal_code
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = _SESSION
+        self.headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
             "Accept": "application/json",
-        })
+        }
 
     def search_wines(self, wine_type: WineType = WineType.TINTO, limit: int = 50, custom_query: str = None) -> list[Wine]:
         """Search wines via Froiz REST API"""
@@ -1139,27 +1212,29 @@ class FroizParser:
         }
 
         try:
-            response = self.session.get(self.API_URL, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-
-            products = data.get("products", [])
-            wines = []
-            for product in products:
-                wine = self._parse_product(product, wine_type)
-                if wine:
-                    wines.append(wine)
-
-            print(f"\u2705 Froiz: {len(wines)} wines (from {len(products)} products)")
-            return wines
+            return _get_wines(
+                self.session, self.API_URL, params, self.headers,
+                lambda response: self._parse_response(response, wine_type),
+                variant=wine_type,
+            )
 
         except requests.RequestException as e:
-            print(f"\u274C Froiz API error: {e}")
+            logger.error("Froiz API error: %s", e)
             return []
         except Exception as e:
-            print(f"\u274C Froiz parsing error: {e}")
+            logger.error("Froiz parsing error: %s", e)
             return []
 
+    def _parse_response(self, response, wine_type: WineType) -> list[Wine]:
+        """Parse a search response into wines"""
+        data = _loads(response.content)
+
+        products = data.get("products", [])
+        wines = [w for w in (self._parse_product(product, wine_type) for product in products) if w]
+
+        logger.info("Froiz: %d wines (from %d products)", len(wines), len(products))
+        return wines
+
     def _parse_product(self, product: dict, search_type: WineType) -> Optional[Wine]:
         """Parse Froiz API product into Wine object"""
         try:
@@ -1170,12 +1245,7 @@ class FroizParser:
 
             # Skip non-wine products
             name_lower = name.lower()
-            exclude_words = [
-                "vinagre", "sangr\u00EDa", "mosto", "refresco", "zumo",
-                "cafe", "capsula", "nespresso", "pimienta", "pimiento", "especias",
-                "jamon", "queso", "aceite", "sal ", "azucar",
-            ]
-            if any(w in name_lower for w in exclude_words):
+            if any(w in name_lower for w in self.EXCLUDE_WORDS):
                 return None
 
             brand = product.get("brand_name", "")
@@ -1209,13 +1279,12 @@ class FroizParser:
             url = f"{self.SITE_URL}/product/{slug}" if slug else f"{self.SITE_URL}"
 
             # Region from family_name (e.g. "D.o. rioja")
-            family = product.get("family_name", "")
-            region = self._extract_region_from_family(family)
+            region = _region_from_keywords(product.get("family_name", ""), self.FAMILY_REGIONS)
             if not region:
-                region = self._extract_region(name)
+                region = _extract_region(name, _FROIZ_REGIONS)
 
             # Wine type
-            wine_type_val = self._extract_wine_type(name)
+            wine_type_val = _extract_wine_type(name)
             if not wine_type_val:
                 wine_type_val = search_type.value
 
@@ -1234,66 +1303,9 @@ class FroizParser:
                 discount_percent=discount_percent,
             )
         except Exception as e:
-            print(f"\u274C Froiz parse error: {e}")
+            logger.debug("Error parsing Froiz product: %s", e)
             return None
 
-    def _extract_region_from_family(self, family: str) -> Optional[str]:
-        """Extract D.O. region from Froiz family_name field"""
-        if not family:
-            return None
-        family_lower = family.lower()
-        region_map = {
-            "rioja": "Rioja",
-            "ribera del duero": "Ribera del Duero",
-            "rias baixas": "R\u00EDas Baixas",
-            "ribeiro": "Ribeiro",
-            "rueda": "Rueda",
-            "valdeorras": "Valdeorras",
-            "bierzo": "Bierzo",
-            "la mancha": "La Mancha",
-            "somontano": "Somontano",
-            "jumilla": "Jumilla",
-            "toro": "Toro",
-            "cigales": "Cigales",
-            "navarra": "Navarra",
-            "valdepe\u00F1as": "Valdepe\u00F1as",
-            "priorat": "Priorat",
-            "pened\u00E8s": "Pened\u00E8s",
-        }
-        for key, region in region_map.items():
-            if key in family_lower:
-                return region
-        return None
-
-    def _extract_region(self, name: str) -> Optional[str]:
-        """Extract DO region from wine name"""
-        regions = [
-            "Rioja", "Ribera del Duero", "Rueda", "R\u00EDas Baixas",
-            "Ribeiro", "Valdeorras", "Bierzo", "Priorat", "Pened\u00E8s",
-            "Jumilla", "Toro", "Navarra", "La Mancha", "Valdepe\u00F1as",
-            "Somontano", "Campo de Borja", "Yecla", "Cigales",
-        ]
-        name_lower = name.lower()
-        for region in regions:
-            if region.lower() in name_lower:
-                return region
-        return None
-
-    def _extract_wine_type(self, name: str) -> Optional[str]:
-        """Extract wine type from name"""
-        name_lower = name.lower()
-        if "tinto" in name_lower:
-            return WineType.TINTO.value
-        elif "blanco" in name_lower:
-            return WineType.BLANCO.value
-        elif "rosado" in name_lower:
-            return WineType.ROSADO.value
-        elif "cava" in name_lower:
-            return WineType.CAVA.value
-        elif "espumoso" in name_lower:
-            return WineType.ESPUMOSO.value
-        return None
-
 
 class WineAggregator:
     """
@@ -1310,7 +1322,7 @@ class WineAggregator:
         self.condis = CondisParser(postal_code)
         self.froiz = FroizParser(postal_code)
         self._parsers = [self.consum, self.mercadona, self.masymas, self.dia, self.condis, self.froiz]
-    
+
     def search_all(self, wine_type: WineType = WineType.TINTO, limit_per_store: int = 20) -> list[Wine]:
         """Search wines across all stores IN PARALLEL"""
         from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -1322,11 +1334,11 @@ class WineAggregator:
                 return parser.search_wines(wine_type, limit_per_store)
             except Exception as e:
                 store_name = parser.__class__.__name__
-                print(f"⚠️ {store_name} error: {e}")
+                logger.warning("%s error: %s", store_name, e)
                 return []
         
-        # Fetch all 5 stores simultaneously
-        with ThreadPoolExecutor(max_workers=5) as pool:
+        # Fetch all stores simultaneously: one worker per store, so latency is the slowest store
+        with ThreadPoolExecutor(max_workers=len(self._parsers)) as pool:
             futures = {pool.submit(fetch_store, p): p for p in self._parsers}
             for future in as_completed(futures, timeout=20):
                 try:
@@ -1334,7 +1346,7 @@ class WineAggregator:
                     all_wines.extend(wines)
                 except Exception as e:
                     parser = futures[future]
-                    print(f"⚠️ {parser.__class__.__name__} timeout/error: {e}")
+                    logger.warning("%s timeout/error: %s", parser.__class__.__name__, e)
         
         return all_wines
     
@@ -1347,31 +1359,34 @@ class WineAggregator:
         
         all_wines = []
         
-        # Create tasks: 4 stores × 4 types = 16 tasks, all in parallel
+        # Create tasks: one per store × type (Mercadona batches its types below)
         def fetch_task(parser, wt):
             try:
                 return parser.search_wines(wt, limit_per_store)
             except Exception as e:
-                print(f"⚠️ {parser.__class__.__name__}/{wt.value} error: {e}")
+                logger.warning("%s/%s error: %s", parser.__class__.__name__, wt.value, e)
                 return []
         
         tasks = []
         for parser in self._parsers:
+            if parser is self.mercadona:
+                continue
             for wt in wine_types:
                 tasks.append((parser, wt))
         
-        # Run all 16 tasks in parallel (max 8 workers to not overwhelm)
+        # Run all tasks in parallel (max 8 workers to not overwhelm)
         with ThreadPoolExecutor(max_workers=8) as pool:
-            futures = {pool.submit(fetch_task, p, wt): (p, wt) for p, wt in tasks}
+            futures = {pool.submit(fetch_task, p, wt): f"{p.__class__.__name__}/{wt.value}" for p, wt in tasks}
+            # Mercadona answers every type in a single Algolia multi-query request
+            futures[pool.submit(self.mercadona.search_wines_multi, wine_types, limit_per_store)] = "MercadonaParser"
             for future in as_completed(futures, timeout=30):
                 try:
                     wines = future.result()
                     all_wines.extend(wines)
                 except Exception as e:
-                    p, wt = futures[future]
-                    print(f"⚠️ {p.__class__.__name__}/{wt.value} timeout: {e}")
+                    logger.warning("%s timeout: %s", futures[future], e)
         
-        print(f"✅ Aggregator: {len(all_wines)} total wines from {len(tasks)} tasks")
+        logger.info("Aggregator: %d total wines from %d tasks", len(all_wines), len(futures))
         return all_wines
     
     def search_premium(self, limit_per_query: int = 20) -> list[Wine]:
@@ -1401,7 +1416,7 @@ class WineAggregator:
             try:
                 return parser.search_wines(custom_query=q, limit=limit_per_query)
             except Exception as e:
-                print(f"⚠️ Premium {parser.__class__.__name__}/{q}: {e}")
+                logger.warning("Premium %s/%s: %s", parser.__class__.__name__, q, e)
                 return []
         
         tasks = []
@@ -1421,40 +1436,48 @@ class WineAggregator:
                             all_wines.append(w)
                 except Exception as e:
                     p, q = futures[future]
-                    print(f"⚠️ Premium {p.__class__.__name__}/{q} timeout: {e}")
+                    logger.warning("Premium %s/%s timeout: %s", p.__class__.__name__, q, e)
         
-        print(f"✅ Premium search: {len(all_wines)} unique wines from {len(tasks)} queries")
+        logger.info("Premium search: %d unique wines from %d queries", len(all_wines), len(tasks))
         return all_wines
     
     def get_recommendations(
         self, 
         wine_type: WineType,
         max_price: float = 15.0,
-        prefer_discount: bool = True
+        prefer_discount: bool = True,
+        top_n: Optional[int] = None
     ) -> list[Wine]:
         """
         Get recommendations with filtering
+
+        With top_n only the best top_n wines are selected (heap, no full sort).
         """
         wines = self.search_all(wine_type, limit_per_store=50)
         
         # Filter by price
         filtered = [w for w in wines if w.price <= max_price]
         
-        # Sort
         if prefer_discount:
-            # Discounts first, then by price
-            filtered.sort(key=lambda w: (
-                0 if w.discount_price else 1,
-                w.price
-            ))
+            # Discounts first, then by price: partition and sort each part on
+            # price alone instead of building a (bucket, price) key per wine
+            groups = ([w for w in filtered if w.discount_price], [w for w in filtered if not w.discount_price])
         else:
-            filtered.sort(key=lambda w: w.price)
+            groups = (filtered,)
         
-        return filtered
+        by_price = attrgetter("price")
+        recommendations = []
+        for group in groups:
+            if top_n is None:
+                recommendations += sorted(group, key=by_price)
+            else:
+                recommendations += heapq.nsmallest(top_n - len(recommendations), group, key=by_price)
+        return recommendations
 
 
 def main():
     """Demo of parsers"""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("🍷 Wine Parser PoC\n")
     
     aggregator = WineAggregator(postal_code="46001")
@@ -1464,23 +1487,29 @@ def main():
     wines = aggregator.get_recommendations(
         wine_type=WineType.TINTO,
         max_price=10.0,
-        prefer_discount=True
+        prefer_discount=True,
+        top_n=10
     )
     
-    print(f"\n📊 Found {len(wines)} wines:\n")
+    print(f"\n📊 Top {len(wines)} wines:\n")
     
-    for i, wine in enumerate(wines[:10], 1):
-        discount_info = ""
-        if wine.discount_price:
-            discount_info = f" (🏷️ {wine.discount_price}€, -{wine.discount_percent}%)"
-        
-        region_info = f" [{wine.region}]" if wine.region else ""
-        ean_info = f" EAN:{wine.ean}" if wine.ean else ""
+    # One write for the whole listing instead of four prints per wine
+    lines = []
+    for i, wine in enumerate(wines, 1):
+        discount_price = wine.discount_price
+        region = wine.region
+        ean = wine.ean
+        discount_info = f" (🏷️ {discount_price}€, -{wine.discount_percent}%)" if discount_price else ""
+        region_info = f" [{region}]" if region else ""
+        ean_info = f" EAN:{ean}" if ean else ""
         
-        print(f"{i}. {wine.name}")
-        print(f"   💰 {wine.price}€{discount_info} | {wine.price_per_liter}€/L")
-        print(f"   🏪 {wine.store.upper()}{region_info}{ean_info}")
-        print(f"   🔗 {wine.url}\n")
+        lines.append(
+            f"{i}. {wine.name}\n"
+            f"   💰 {wine.price}€{discount_info} | {wine.price_per_liter}€/L\n"
+            f"   🏪 {wine.store.upper()}{region_info}{ean_info}\n"
+            f"   🔗 {wine.url}\n\n"
+        )
+    sys.stdout.write("".join(lines))
 
 
 if __name__ == "__main__":